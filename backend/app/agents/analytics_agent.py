@@ -1,9 +1,12 @@
-from typing import TypedDict, Annotated, Sequence, AsyncGenerator, Optional
+from typing import Any, Final, TypedDict, Annotated, Sequence, AsyncGenerator, Optional
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END
 from sqlalchemy.ext.asyncio import AsyncSession
+from cachetools import TTLCache
 from app.core.config import settings
+from app.core.database import warm_pool
+from app.core.conversation_store import ConversationStore, create_conversation_store
 from app.core.llm_cache import llm_cache
 from app.models.analytics import DATABASE_SCHEMA
 from app.tools.sql_tools import SQL_TOOLS
@@ -13,7 +16,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 import operator
-import json
+import httpx
+from functools import lru_cache
+import asyncio
+from collections import defaultdict
+import orjson
+import re
+import hashlib
 from langchain.agents import create_agent
 
 class AgentState(TypedDict):
@@ -21,7 +30,7 @@ class AgentState(TypedDict):
     suggestions: list[dict]
 
 
-SYSTEM_PROMPT = f"""You are an intelligent analytics assistant that helps users understand their business data.
+SYSTEM_PROMPT: Final[str] = f"""You are an intelligent analytics assistant that helps users understand their business data.
 You have access to a PostgreSQL database with sales, customer, and product data.
 
 {DATABASE_SCHEMA}
@@ -36,8 +45,8 @@ RESPONSE GUIDELINES:
 - Always be conversational and helpful
 - When showing data, provide clear explanations of what it means
 - Proactively suggest relevant analyses or visualizations
-- When generating charts, format the response with a special JSON block
-- For presentations, provide a structured outline that can be previewed
+- When generating charts, call the `generate_chart_config` tool
+- For presentations, call the `create_presentation_outline` tool so the outline can be previewed
 
 SUGGESTIONS:
 After each response, provide 2-4 clickable suggestions for the user. Format them as:
@@ -47,53 +56,81 @@ After each response, provide 2-4 clickable suggestions for the user. Format them
 - Create a quarterly report presentation
 [/SUGGESTIONS]
 
-CHART OUTPUT FORMAT:
-When generating charts, include the chart config in your response like this:
-```chart
-{{
-    "type": "chart",
-    "chartType": "bar|line|pie|area|scatter",
-    "title": "Chart Title",
-    "data": [...],
-    "xAxisKey": "key_name",
-    "yAxisKeys": ["value1", "value2"],
-    "colors": ["#8884d8", "#82ca9d"]
-}}
-```
-
-PRESENTATION OUTPUT FORMAT:
-When creating presentations, include the presentation config like this:
-```presentation
-{{
-    "type": "presentation",
-    "title": "Presentation Title",
-    "slides": [...]
-}}
-```
+CHARTS AND PRESENTATIONS:
+Always emit charts through the `generate_chart_config` tool and presentations through the
+`create_presentation_outline` tool. The tool results are delivered to the user directly, so never
+repeat chart or presentation JSON in your reply as markdown code blocks.
 
 Always be accurate with data. If you're unsure, query the database to get precise information.
 """
 
+# Built once at import. The system prompt and tool schemas form the request prefix,
+# so keeping both byte-identical across calls lets OpenAI's automatic prompt caching
+# serve them at the cached-token rate.
+ALL_TOOLS = (*SQL_TOOLS, *CHART_TOOLS, *PPT_TOOLS)
 
-def create_analytics_agent():
-    """Create the LangGraph analytics agent with all tools."""
-    llm = ChatOpenAI(
+# Only chart and presentation tools return payloads the stream forwards to the client;
+# SQL results are consumed by the LLM and never need parsing here.
+STRUCTURED_OUTPUT_TOOLS = frozenset(t.name for t in (*CHART_TOOLS, *PPT_TOOLS))
+STRUCTURED_OUTPUT_TYPES = ("chart", "presentation", "presentation_update")
+
+# Cheap pre-check for a structured "type" before paying for a full parse of large payloads;
+# tolerates both json.dumps (": ") and orjson (":") separators
+_STRUCTURED_TYPE_RE = re.compile(r'"type":\s*"(?:chart|presentation|presentation_update)"')
+
+
+RESPONSE_MARKERS = ("```chart", "```presentation", "[SUGGESTIONS]")
+
+# An unclosed [SUGGESTIONS] block stops at the next fence or marker, so later
+# chart/presentation fences are still extracted
+_BLOCK_RE = re.compile(
+    r"```(chart|presentation)(.*?)```"
+    r"|\[SUGGESTIONS\](.*?)(?:\[/SUGGESTIONS\]|(?=```|\[SUGGESTIONS\])|\Z)",
+    re.DOTALL,
+)
+
+# One "- suggestion" bullet per line inside a [SUGGESTIONS] block
+_SUGGESTION_ITEM_RE = re.compile(r"^[ \t]*-[- \t]*(.*?)\s*$", re.MULTILINE)
+
+
+SUMMARY_PROMPT = """Summarize the following conversation between a user and an analytics assistant.
+Keep the questions asked, the key figures and findings, and any charts or presentations that were created.
+Be concise; the summary replaces these messages in the assistant's context."""
+
+
+@lru_cache()
+def get_llm() -> ChatOpenAI:
+    """Return the process-wide chat model, backed by a pooled HTTP/2 client."""
+    return ChatOpenAI(
         model="gpt-4o-mini",
         temperature=0.7,
         api_key=settings.openai_api_key,
+        http_async_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        ),
     )
 
-    all_tools = SQL_TOOLS + CHART_TOOLS + PPT_TOOLS
+
+def create_analytics_agent():
+    """Create the LangGraph analytics agent with all tools."""
+    llm = get_llm()
 
     agent = create_agent(
         llm,
-        all_tools,
+        ALL_TOOLS,
         system_prompt=SYSTEM_PROMPT,
     )
 
     return agent
 
 
+@lru_cache()
+def get_analytics_agent():
+    """Return the process-wide compiled analytics agent, building it on first use."""
+    return create_analytics_agent()
+
+
 def parse_agent_response(response: str) -> dict:
     """Parse the agent response to extract charts, presentations, and suggestions."""
     result = {
@@ -103,54 +140,46 @@ def parse_agent_response(response: str) -> dict:
         "suggestions": [],
     }
 
-    if "```chart" in response:
-        parts = response.split("```chart")
-        for part in parts[1:]:
-            if "```" in part:
-                chart_json = part.split("```")[0].strip()
-                try:
-                    chart_config = json.loads(chart_json)
-                    result["charts"].append(chart_config)
-                except json.JSONDecodeError:
-                    pass
-
-    if "```presentation" in response:
-        parts = response.split("```presentation")
-        for part in parts[1:]:
-            if "```" in part:
-                ppt_json = part.split("```")[0].strip()
-                try:
-                    ppt_config = json.loads(ppt_json)
-                    result["presentations"].append(ppt_config)
-                except json.JSONDecodeError:
-                    pass
-
-    if "[SUGGESTIONS]" in response:
-        suggestions_match = response.split("[SUGGESTIONS]")[1].split("[/SUGGESTIONS]")[0]
-        suggestions = [
-            s.strip().lstrip("- ").strip()
-            for s in suggestions_match.strip().split("\n")
-            if s.strip().startswith("-")
-        ]
-        result["suggestions"] = suggestions
+    # Plain-text replies (the common case) have no fenced blocks or suggestions
+    if "```" not in response and "[SUGGESTIONS]" not in response:
+        result["text"] = response.strip()
+        return result
+
+    for match in _BLOCK_RE.finditer(response):
+        block_type = match.group(1)
+
+        if block_type:
+            try:
+                config = orjson.loads(match.group(2))
+            except orjson.JSONDecodeError:
+                continue
+            result["charts" if block_type == "chart" else "presentations"].append(config)
+
+        elif not result["suggestions"]:
+            result["suggestions"] = _SUGGESTION_ITEM_RE.findall(match.group(3))
 
-    clean_text = response
-    for marker in ["```chart", "```presentation", "[SUGGESTIONS]"]:
-        if marker in clean_text:
-            clean_text = clean_text.split(marker)[0]
-    result["text"] = clean_text.strip()
+    # Cut at the earliest marker even when its block is unterminated.
+    positions = (response.find(marker) for marker in RESPONSE_MARKERS)
+    first_marker = min((p for p in positions if p >= 0), default=len(response))
+    result["text"] = response[:first_marker].strip()
 
     return result
 
 
+def _chart_signature(chart: dict) -> bytes:
+    """Compact digest of a chart config's canonical (sorted-key) JSON encoding."""
+    encoded = orjson.dumps(chart, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
 def dedupe_charts(charts: list[dict]) -> list[dict]:
     """Remove duplicate chart configs while preserving order."""
     seen = set()
     unique = []
     for chart in charts:
         try:
-            signature = json.dumps(chart, sort_keys=True)
-        except (TypeError, ValueError):
+            signature = _chart_signature(chart)
+        except TypeError:
             signature = str(chart)
         if signature in seen:
             continue
@@ -159,8 +188,22 @@ def dedupe_charts(charts: list[dict]) -> list[dict]:
     return unique
 
 
-def apply_presentation_update(presentation: dict, update: dict) -> dict:
-    """Apply a presentation update event to a presentation config."""
+def build_slide_index(presentation: dict) -> dict[str, int]:
+    """Map slide ids to their position in the presentation's slide list."""
+    return {slide.get("id"): i for i, slide in enumerate(presentation.get("slides", []))}
+
+
+def apply_presentation_update(
+    presentation: dict,
+    update: dict,
+    slide_index: Optional[dict[str, int]] = None,
+) -> dict:
+    """Apply a presentation update event to a presentation config, in place.
+
+    The updated slide is replaced in ``presentation["slides"]``, so callers that
+    share the presentation must pass their own copy. Pass a ``slide_index`` from
+    ``build_slide_index`` to reuse it across several updates.
+    """
     if not presentation or not update:
         return presentation
 
@@ -175,25 +218,83 @@ def apply_presentation_update(presentation: dict, update: dict) -> dict:
 
     if isinstance(chart_config, str):
         try:
-            chart_config = json.loads(chart_config)
-        except json.JSONDecodeError:
+            chart_config = orjson.loads(chart_config)
+        except orjson.JSONDecodeError:
             chart_config = {"raw": chart_config}
 
-    updated_slides = []
-    for slide in presentation.get("slides", []):
-        if slide.get("id") == slide_id:
-            updated_slides.append({
-                **slide,
-                "contentType": "chart",
-                "chartConfig": chart_config,
-            })
-        else:
-            updated_slides.append(slide)
-
-    return {
-        **presentation,
-        "slides": updated_slides,
-    }
+    if slide_index is None:
+        slide_index = build_slide_index(presentation)
+
+    position = slide_index.get(slide_id)
+    if position is None:
+        return presentation
+
+    slide = dict(presentation["slides"][position])
+    slide.update(contentType="chart", chartConfig=chart_config)
+    presentation["slides"][position] = slide
+
+    return presentation
+
+
+def parse_tool_output(tool_name: str, tool_output: Any) -> Optional[dict]:
+    """Return the chart or presentation payload carried by a tool output, if any."""
+    if tool_name not in STRUCTURED_OUTPUT_TOOLS or not isinstance(tool_output, str):
+        return None
+
+    # Payloads are JSON objects; skip error strings and other plain-text outputs without raising
+    if not tool_output.startswith("{") or not _STRUCTURED_TYPE_RE.search(tool_output):
+        return None
+
+    try:
+        output_data = orjson.loads(tool_output)
+    except (orjson.JSONDecodeError, TypeError) as e:
+        logger.warning(f"Failed to parse tool output: {e}")
+        return None
+
+    if isinstance(output_data, dict) and output_data.get("type") in STRUCTURED_OUTPUT_TYPES:
+        return output_data
+    return None
+
+
+def merge_agent_outputs(
+    parsed: dict,
+    charts: list[dict],
+    presentations: list[dict],
+    presentation_updates: list[dict],
+) -> tuple[list[dict], list[dict]]:
+    """Merge tool-emitted charts/presentations with any parsed from the reply text."""
+    # Text-only replies are the common case; avoid concatenating or deduping empty lists
+    if not parsed["presentations"]:
+        all_presentations = presentations
+    elif not presentations:
+        all_presentations = parsed["presentations"]
+    else:
+        all_presentations = presentations + parsed["presentations"]
+
+    all_charts = charts + parsed["charts"] if parsed["charts"] else charts
+    # Repeated tool calls can emit identical charts, so dedupe any list of two or more
+    if len(all_charts) > 1:
+        all_charts = dedupe_charts(all_charts)
+
+    if presentation_updates and all_presentations:
+        updates_by_presentation = defaultdict(list)
+        for update in presentation_updates:
+            updates_by_presentation[update.get("presentationId")].append(update)
+
+        updated_presentations = []
+        for pres in all_presentations:
+            updates = updates_by_presentation.get(pres.get("presentationId"))
+            if updates:
+                # Copy once per presentation; updates then apply in place
+                pres = dict(pres)
+                pres["slides"] = list(pres.get("slides", []))
+                slide_index = build_slide_index(pres)
+                for update in updates:
+                    pres = apply_presentation_update(pres, update, slide_index)
+            updated_presentations.append(pres)
+        all_presentations = updated_presentations
+
+    return all_charts, all_presentations
 
 
 class AnalyticsAgentRunner:
@@ -201,82 +302,231 @@ class AnalyticsAgentRunner:
 
     MODEL_NAME = "gpt-4o-mini"
 
-    def __init__(self):
-        self.agent = create_analytics_agent()
-        self.conversations: dict[str, list[BaseMessage]] = {}
-
-    async def chat(self, conversation_id: str, message: str, db: Optional[AsyncSession] = None) -> dict:
-        """Process a chat message and return the agent response."""
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = []
-
-        self.conversations[conversation_id].append(HumanMessage(content=message))
+    def __init__(self, max_recent_turns: int = 20):
+        self.agent = get_analytics_agent()
+        self.llm = get_llm()
+        self.max_recent_turns = max_recent_turns
+        # Hard cap per conversation; _compact_history keeps histories well below it
+        self.max_history_messages = max_recent_turns * 4
+        self.conversations: ConversationStore = create_conversation_store(self.max_history_messages)
+        # In-process response cache for repeated prompts (e.g. clicked suggestions)
+        self.response_cache: TTLCache[str, dict] = TTLCache(maxsize=1024, ttl=300)
+
+    def _response_cache_key(self, history: list[BaseMessage], message: str) -> str:
+        """Hash the normalized message together with the last two messages of the conversation."""
+        key = hashlib.blake2b(digest_size=16)
+        for msg in history[-2:]:
+            key.update(f"{msg.type}:{msg.content}\0".encode())
+        key.update(" ".join(message.split()).lower().encode())
+        return key.hexdigest()
+
+    async def _compact_history(self, conversation_id: str, history: list[BaseMessage]) -> list[BaseMessage]:
+        """Summarize the oldest half of a long conversation into a single message.
+
+        Keeps per-call input tokens bounded: once a conversation exceeds
+        ``max_recent_turns`` turns, the older messages are replaced by a summary.
+        Returns the (possibly compacted) history.
+        """
+        if len(history) <= self.max_recent_turns * 2:
+            return history
+
+        # Split on a turn boundary so the recent window starts with a user message
+        split = len(history) // 2
+        while split < len(history) and not isinstance(history[split], HumanMessage):
+            split += 1
+        if split >= len(history) - 1:
+            return history
+        older = history[:split]
+
+        # The summary replaces the older messages in the store, so each range is summarized once
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in older)
+        result = await self.llm.ainvoke([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=transcript),
+        ])
+        summary = result.content
+
+        logger.info(f"Summarized {len(older)} messages for conversation {conversation_id}")
+        history = [
+            SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"),
+            *history[split:],
+        ]
+        await self.conversations.replace(conversation_id, history)
+        return history
+
+    def _build_response(self, conversation_id: str, turn_messages: list[BaseMessage], parsed: dict) -> dict:
+        """Build the chat response for one agent turn from its new messages and parsed reply."""
+        # Collect charts and presentations emitted by tools during this turn
+        collected = {output_type: [] for output_type in STRUCTURED_OUTPUT_TYPES}
+        for msg in turn_messages:
+            if isinstance(msg, ToolMessage):
+                output_data = parse_tool_output(msg.name, msg.content)
+                if output_data:
+                    collected[output_data["type"]].append(output_data)
+
+        all_charts, all_presentations = merge_agent_outputs(
+            parsed,
+            collected["chart"],
+            collected["presentation"],
+            collected["presentation_update"],
+        )
+
+        return {
+            "conversation_id": conversation_id,
+            "response": parsed["text"],
+            "charts": all_charts,
+            "presentations": all_presentations,
+            "suggestions": parsed["suggestions"],
+        }
 
-        # Check cache first
-        if db:
-            cached_response = await llm_cache.get(db, self.conversations[conversation_id], self.MODEL_NAME)
+    async def _begin_turn(
+        self,
+        conversation_id: str,
+        message: str,
+        db: Optional[AsyncSession],
+        cacheable: bool,
+    ) -> tuple[Optional[dict], Optional[str], list[BaseMessage], Optional[asyncio.Task]]:
+        """Record the user's message and serve a cached reply when there is one.
+
+        Returns ``(cached, cache_key, history, prewarm)``. On a cache hit ``cached`` is the
+        response, already appended to the conversation. Otherwise ``cached`` is None,
+        ``history`` is the compacted history to run the agent on and ``prewarm`` is the
+        pending connection-warming task to await.
+        """
+        history = await self.conversations.get(conversation_id)
+
+        cache_key = self._response_cache_key(history, message) if cacheable else None
+        human_message = HumanMessage(content=message)
+        history.append(human_message)
+        await self.conversations.append(conversation_id, human_message)
+
+        # Single lookup: the entry may expire between a membership test and a read
+        cached_response = self.response_cache.get(cache_key) if cache_key else None
+        if cached_response is not None:
+            logger.info(f"Response cache hit for conversation {conversation_id}")
+        elif db and cacheable:
+            cached_response = await llm_cache.get(db, history, self.MODEL_NAME)
             if cached_response:
                 logger.info(f"Cache hit for conversation {conversation_id}")
-                # Add cached AI message to conversation history
-                self.conversations[conversation_id].append(AIMessage(content=cached_response["raw_response"]))
-                return cached_response["parsed"]
 
-        state = {"messages": self.conversations[conversation_id]}
+        if cached_response:
+            # Add cached AI message to conversation history
+            await self.conversations.append(conversation_id, AIMessage(content=cached_response["raw_response"]))
+            return {**cached_response["parsed"], "conversation_id": conversation_id}, None, history, None
 
-        result = await self.agent.ainvoke(state)
+        # Warm a database connection while the LLM decides on its first tool call
+        prewarm = asyncio.create_task(warm_pool())
 
-        ai_message = result["messages"][-1]
-        self.conversations[conversation_id].append(ai_message)
+        history = await self._compact_history(conversation_id, history)
+        return None, cache_key, history, prewarm
 
-        parsed = parse_agent_response(ai_message.content)
+    async def _cache_response(
+        self,
+        cache_key: Optional[str],
+        db: Optional[AsyncSession],
+        history: list[BaseMessage],
+        response: dict,
+        raw_response: str,
+    ) -> None:
+        """Store a fresh reply in the in-process response cache and the LLM cache table."""
+        if not cache_key:
+            return
 
-        response = {
-            "conversation_id": conversation_id,
-            "response": parsed["text"],
-            "charts": parsed["charts"],
-            "presentations": parsed["presentations"],
-            "suggestions": parsed["suggestions"],
-        }
+        entry = {"parsed": response, "raw_response": raw_response}
+        self.response_cache[cache_key] = entry
 
-        # Cache the response
         if db:
             await llm_cache.set(
                 db,
-                self.conversations[conversation_id][:-1],  # Messages before AI response
+                history,  # Messages before AI response
                 self.MODEL_NAME,
-                {"parsed": response, "raw_response": ai_message.content}
+                entry,
             )
 
-        return response
+    async def chat(
+        self,
+        conversation_id: str,
+        message: str,
+        db: Optional[AsyncSession] = None,
+        cacheable: bool = True,
+    ) -> dict:
+        """Process a chat message and return the agent response."""
+        cached, cache_key, history, prewarm = await self._begin_turn(conversation_id, message, db, cacheable)
+        if cached is not None:
+            return cached
 
-    def clear_conversation(self, conversation_id: str):
-        """Clear a conversation history."""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        state = {"messages": history}
 
-    async def chat_stream(self, conversation_id: str, message: str, db: Optional[AsyncSession] = None) -> AsyncGenerator[dict, None]:
-        """Process a chat message and stream events including tool calls."""
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = []
+        result, _ = await asyncio.gather(self.agent.ainvoke(state), prewarm)
 
-        self.conversations[conversation_id].append(HumanMessage(content=message))
+        ai_message = result["messages"][-1]
+        await self.conversations.append(conversation_id, ai_message)
 
-        # Check cache first
-        if db:
-            cached_response = await llm_cache.get(db, self.conversations[conversation_id], self.MODEL_NAME)
-            if cached_response:
-                print(f"Cache hit for conversation {conversation_id}")
-                # Add cached AI message to conversation history
-                self.conversations[conversation_id].append(AIMessage(content=cached_response["raw_response"]))
-                # Yield cached response as final
-                yield {
-                    "type": "final",
-                    **cached_response["parsed"],
-                    "cached": True,
-                }
-                return
+        parsed = await asyncio.to_thread(parse_agent_response, ai_message.content)
+        response = self._build_response(
+            conversation_id,
+            result["messages"][len(state["messages"]):],
+            parsed,
+        )
+
+        await self._cache_response(cache_key, db, history, response, ai_message.content)
+
+        return response
 
-        state = {"messages": self.conversations[conversation_id]}
+    async def chat_batch(self, pairs: list[tuple[str, str]]) -> list[dict]:
+        """Process several independent ``(conversation_id, message)`` pairs concurrently.
+
+        Intended for bulk jobs (evaluations, backfills); responses are not cached.
+        """
+        conversation_ids = [conversation_id for conversation_id, _ in pairs]
+        if len(set(conversation_ids)) != len(conversation_ids):
+            raise ValueError("chat_batch requires a unique conversation_id per pair")
+
+        async def prepare(conversation_id: str, message: str) -> dict:
+            history = await self.conversations.get(conversation_id)
+            human_message = HumanMessage(content=message)
+            history.append(human_message)
+            await self.conversations.append(conversation_id, human_message)
+            return {"messages": await self._compact_history(conversation_id, history)}
+
+        states = await asyncio.gather(*(prepare(cid, message) for cid, message in pairs))
+
+        results = await self.agent.abatch(states)
+
+        ai_messages = [result["messages"][-1] for result in results]
+        parsed_replies = await asyncio.gather(
+            *(asyncio.to_thread(parse_agent_response, msg.content) for msg in ai_messages)
+        )
+
+        responses = []
+        for conversation_id, state, result, ai_message, parsed in zip(
+            conversation_ids, states, results, ai_messages, parsed_replies
+        ):
+            await self.conversations.append(conversation_id, ai_message)
+            responses.append(
+                self._build_response(conversation_id, result["messages"][len(state["messages"]):], parsed)
+            )
+
+        return responses
+
+    async def clear_conversation(self, conversation_id: str):
+        """Clear a conversation history."""
+        await self.conversations.clear(conversation_id)
+
+    async def chat_stream(
+        self,
+        conversation_id: str,
+        message: str,
+        db: Optional[AsyncSession] = None,
+        cacheable: bool = True,
+    ) -> AsyncGenerator[dict, None]:
+        """Process a chat message and stream events including tool calls."""
+        cached, cache_key, history, prewarm = await self._begin_turn(conversation_id, message, db, cacheable)
+        if cached is not None:
+            yield {"type": "final", **cached, "cached": True}
+            return
+
+        state = {"messages": history}
         final_sent = False
 
         # Track presentations and charts created via tools
@@ -314,31 +564,26 @@ class AnalyticsAgentRunner:
                 logger.info(f"Tool {tool_name} ended. Output type: {type(tool_output).__name__}")
 
                 # Parse tool output to capture presentations and charts
-                if tool_output and isinstance(tool_output, str):
-                    try:
-                        output_data = json.loads(tool_output)
-                        if isinstance(output_data, dict):
-                            output_type = output_data.get("type", "")
-
-                            # Capture and immediately stream presentation
-                            if output_type == "presentation":
-                                print(f"Parsed tool output data of type presentation: {output_data}")
-                                collected_presentations.append(output_data)
-                                yield {
-                                    "type": "presentation",
-                                    "presentation": output_data,
-                                }
-                            elif output_type == "presentation_update":
-                                collected_presentation_updates.append(output_data)
-                                yield {
-                                    "type": "presentation_update",
-                                    "presentationUpdate": output_data,
-                                }
-                            # Capture charts from chart tools
-                            elif output_type == "chart":
-                                collected_charts.append(output_data)
-                    except (json.JSONDecodeError, TypeError) as e:
-                        logger.warning(f"Failed to parse tool output: {e}")
+                output_data = parse_tool_output(tool_name, tool_output)
+                output_type = output_data["type"] if output_data else None
+
+                # Capture and immediately stream presentation
+                if output_type == "presentation":
+                    logger.debug("Parsed tool output data of type presentation: %s", output_data)
+                    collected_presentations.append(output_data)
+                    yield {
+                        "type": "presentation",
+                        "presentation": output_data,
+                    }
+                elif output_type == "presentation_update":
+                    collected_presentation_updates.append(output_data)
+                    yield {
+                        "type": "presentation_update",
+                        "presentationUpdate": output_data,
+                    }
+                # Capture charts from chart tools
+                elif output_type == "chart":
+                    collected_charts.append(output_data)
 
                 yield {
                     "type": "tool_end",
@@ -359,21 +604,16 @@ class AnalyticsAgentRunner:
                             and final_message.content
                             and isinstance(final_message, AIMessage)
                             and not getattr(final_message, "tool_calls", None)):
-                            self.conversations[conversation_id].append(final_message)
-                            parsed = parse_agent_response(final_message.content)
+                            await self.conversations.append(conversation_id, final_message)
+                            parsed = await asyncio.to_thread(parse_agent_response, final_message.content)
 
                             # Merge collected presentations/charts with parsed ones
-                            all_presentations = collected_presentations + parsed["presentations"]
-                            all_charts = dedupe_charts(collected_charts + parsed["charts"])
-
-                            if collected_presentation_updates and all_presentations:
-                                updated_presentations = []
-                                for pres in all_presentations:
-                                    updated_pres = pres
-                                    for update in collected_presentation_updates:
-                                        updated_pres = apply_presentation_update(updated_pres, update)
-                                    updated_presentations.append(updated_pres)
-                                all_presentations = updated_presentations
+                            all_charts, all_presentations = merge_agent_outputs(
+                                parsed,
+                                collected_charts,
+                                collected_presentations,
+                                collected_presentation_updates,
+                            )
 
                             final_sent = True
                             response = {
@@ -385,16 +625,11 @@ class AnalyticsAgentRunner:
                                 "suggestions": parsed["suggestions"],
                             }
 
-                            # Cache the response
-                            if db:
-                                await llm_cache.set(
-                                    db,
-                                    self.conversations[conversation_id][:-1],  # Messages before AI response
-                                    self.MODEL_NAME,
-                                    {"parsed": response, "raw_response": final_message.content}
-                                )
+                            await self._cache_response(cache_key, db, history, response, final_message.content)
 
                             yield response
 
+        await prewarm
+
 
 agent_runner = AnalyticsAgentRunner()
@@ -1,15 +1,23 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Any
+from typing import Any, AsyncGenerator, AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.analytics_agent import agent_runner
 from app.core.database import get_db
+import asyncio
 import uuid
-import json
+import orjson
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+# SSE events are flushed in batches of up to STREAM_BATCH_SIZE or every STREAM_BATCH_WINDOW seconds
+STREAM_BATCH_SIZE = 16
+STREAM_BATCH_WINDOW = 0.05
+
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -31,7 +39,9 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
 
     try:
         result = await agent_runner.chat(conversation_id, request.message, db)
-        return ChatResponse(**result)
+        # response_model validates and serializes the dict once; building a ChatResponse here
+        # would only validate it a second time
+        return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -39,17 +49,82 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
 @router.delete("/{conversation_id}")
 async def clear_conversation(conversation_id: str):
     """Clear a conversation history."""
-    agent_runner.clear_conversation(conversation_id)
+    await agent_runner.clear_conversation(conversation_id)
     return {"status": "success", "message": "Conversation cleared"}
 
 
+async def batch_events(
+    events: AsyncIterator[dict],
+    max_size: int = STREAM_BATCH_SIZE,
+    window: float = STREAM_BATCH_WINDOW,
+) -> AsyncGenerator[list[dict], None]:
+    """Group events into batches of up to ``max_size`` collected within ``window`` seconds.
+
+    A ``final`` event always flushes its batch immediately.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for event in events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(done)
+
+    loop = asyncio.get_running_loop()
+    producer = asyncio.create_task(pump())
+    pending: list[dict] = []
+    deadline = 0.0
+
+    try:
+        while True:
+            if pending:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    yield pending
+                    pending = []
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                if pending:
+                    yield pending
+                raise item
+
+            if not pending:
+                deadline = loop.time() + window
+            pending.append(item)
+
+            if len(pending) >= max_size or item.get("type") == "final":
+                yield pending
+                pending = []
+
+        if pending:
+            yield pending
+    finally:
+        producer.cancel()
+
+
+def sse_frame(event: dict) -> bytes:
+    """Encode one event as an SSE ``data:`` frame."""
+    return SSE_PREFIX + orjson.dumps(event, option=orjson.OPT_NON_STR_KEYS) + SSE_SUFFIX
+
+
 async def generate_stream(conversation_id: str, message: str, db: AsyncSession):
     """Generate SSE stream from agent events."""
     try:
-        async for event in agent_runner.chat_stream(conversation_id, message, db):
-            yield f"data: {json.dumps(event)}\n\n"
+        async for batch in batch_events(agent_runner.chat_stream(conversation_id, message, db)):
+            # Bytes chunks are sent as-is by StreamingResponse, with no per-chunk encode
+            yield b"".join(map(sse_frame, batch))
     except Exception as e:
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        yield sse_frame({"type": "error", "message": str(e)})
 
 
 @router.post("/stream")
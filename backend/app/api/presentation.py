@@ -1,16 +1,26 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Any
+from typing import Any, Iterator
 from pptx import Presentation
 from pptx.util import Inches, Pt
 # from pptx.dml.color import RgbColor
 # from pptx.enum.text import PP_ALIGN
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+import asyncio
 import io
 import base64
 
 router = APIRouter(prefix="/api/presentation", tags=["presentation"])
 
+# python-pptx is blocking, so decks are built on a small dedicated pool
+# to keep the event loop (and in-flight chat streams) responsive
+_PPTX_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pptx")
+
+PPTX_SPOOL_MAX_SIZE = 4 << 20
+PPTX_CHUNK_SIZE = 64 * 1024
+
 
 class SlideContent(BaseModel):
     id: str
@@ -28,82 +38,103 @@ class PresentationRequest(BaseModel):
     slides: list[SlideContent]
 
 
+def _body_placeholder(slide):
+    """Return the body placeholder (idx 1) of a content layout slide, or None."""
+    try:
+        return slide.placeholders[1]
+    except KeyError:
+        return None
+
+
+def _build_pptx(request: PresentationRequest) -> SpooledTemporaryFile:
+    """Render the presentation to a rewound temp file. Blocking; run it off the event loop."""
+    prs = Presentation()
+    prs.slide_width = Inches(13.333)
+    prs.slide_height = Inches(7.5)
+
+    title_slide_layout = prs.slide_layouts[0]
+    title_slide = prs.slides.add_slide(title_slide_layout)
+    title_slide.shapes.title.text = request.title
+
+    for slide_data in request.slides:
+        if slide_data.contentType == "bullets":
+            slide_layout = prs.slide_layouts[1]
+        elif slide_data.contentType == "chart":
+            slide_layout = prs.slide_layouts[5]
+        else:
+            slide_layout = prs.slide_layouts[1]
+
+        slide = prs.slides.add_slide(slide_layout)
+
+        if slide.shapes.title:
+            slide.shapes.title.text = slide_data.title
+
+        if slide_data.contentType == "bullets" and isinstance(slide_data.content, list):
+            body_shape = _body_placeholder(slide)
+
+            if body_shape:
+                tf = body_shape.text_frame
+                tf.clear()
+                for i, bullet in enumerate(slide_data.content):
+                    if i == 0:
+                        p = tf.paragraphs[0]
+                    else:
+                        p = tf.add_paragraph()
+                    p.text = bullet
+                    p.level = 0
+
+        elif slide_data.contentType == "text" and isinstance(slide_data.content, str):
+            body_shape = _body_placeholder(slide)
+
+            if body_shape:
+                body_shape.text_frame.text = slide_data.content
+
+        elif slide_data.contentType == "chart" and slide_data.chartImage:
+            image_data = base64.b64decode(slide_data.chartImage)
+            image_stream = io.BytesIO(image_data)
+            slide.shapes.add_picture(
+                image_stream,
+                Inches(1),
+                Inches(1.5),
+                width=Inches(11),
+                height=Inches(5.5),
+            )
+
+        if slide_data.notes:
+            notes_slide = slide.notes_slide
+            notes_slide.notes_text_frame.text = slide_data.notes
+
+    # Small decks stay in memory; large ones (embedded chart images) spill to disk
+    output = SpooledTemporaryFile(max_size=PPTX_SPOOL_MAX_SIZE)
+    try:
+        prs.save(output)
+        output.seek(0)
+    except BaseException:
+        output.close()
+        raise
+    return output
+
+
+def _iter_file(file: SpooledTemporaryFile) -> Iterator[bytes]:
+    """Yield the file in fixed-size chunks, closing it once exhausted."""
+    try:
+        while chunk := file.read(PPTX_CHUNK_SIZE):
+            yield chunk
+    finally:
+        file.close()
+
+
 @router.post("/generate")
 async def generate_presentation(request: PresentationRequest):
     """Generate a PowerPoint file from the presentation configuration."""
     try:
-        prs = Presentation()
-        prs.slide_width = Inches(13.333)
-        prs.slide_height = Inches(7.5)
-
-        title_slide_layout = prs.slide_layouts[0]
-        title_slide = prs.slides.add_slide(title_slide_layout)
-        title_slide.shapes.title.text = request.title
-
-        for slide_data in request.slides:
-            if slide_data.contentType == "bullets":
-                slide_layout = prs.slide_layouts[1]
-            elif slide_data.contentType == "chart":
-                slide_layout = prs.slide_layouts[5]
-            else:
-                slide_layout = prs.slide_layouts[1]
-
-            slide = prs.slides.add_slide(slide_layout)
-
-            if slide.shapes.title:
-                slide.shapes.title.text = slide_data.title
-
-            if slide_data.contentType == "bullets" and isinstance(slide_data.content, list):
-                body_shape = None
-                for shape in slide.shapes:
-                    if shape.has_text_frame and shape != slide.shapes.title:
-                        body_shape = shape
-                        break
-
-                if body_shape:
-                    tf = body_shape.text_frame
-                    tf.clear()
-                    for i, bullet in enumerate(slide_data.content):
-                        if i == 0:
-                            p = tf.paragraphs[0]
-                        else:
-                            p = tf.add_paragraph()
-                        p.text = bullet
-                        p.level = 0
-
-            elif slide_data.contentType == "text" and isinstance(slide_data.content, str):
-                body_shape = None
-                for shape in slide.shapes:
-                    if shape.has_text_frame and shape != slide.shapes.title:
-                        body_shape = shape
-                        break
-
-                if body_shape:
-                    body_shape.text_frame.text = slide_data.content
-
-            elif slide_data.contentType == "chart" and slide_data.chartImage:
-                image_data = base64.b64decode(slide_data.chartImage)
-                image_stream = io.BytesIO(image_data)
-                slide.shapes.add_picture(
-                    image_stream,
-                    Inches(1),
-                    Inches(1.5),
-                    width=Inches(11),
-                    height=Inches(5.5),
-                )
-
-            if slide_data.notes:
-                notes_slide = slide.notes_slide
-                notes_slide.notes_text_frame.text = slide_data.notes
-
-        output = io.BytesIO()
-        prs.save(output)
-        output.seek(0)
+        loop = asyncio.get_running_loop()
+        output = await loop.run_in_executor(_PPTX_EXECUTOR, _build_pptx, request)
 
         filename = f"{request.title.replace(' ', '_')}.pptx"
 
         return StreamingResponse(
-            output,
+            _iter_file(output),
             media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
             headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
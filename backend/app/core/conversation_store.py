@@ -0,0 +1,150 @@
+from typing import Protocol, Sequence
+from collections import deque
+from cachetools import TTLCache
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+import orjson
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+
+class ConversationStore(Protocol):
+    """Storage for per-conversation message histories."""
+
+    async def get(self, conversation_id: str) -> list[BaseMessage]:
+        """Return a snapshot of the conversation's messages (empty if unknown)."""
+        ...
+
+    async def append(self, conversation_id: str, *messages: BaseMessage) -> None:
+        """Append messages to the conversation."""
+        ...
+
+    async def replace(self, conversation_id: str, messages: Sequence[BaseMessage]) -> None:
+        """Replace the conversation's messages."""
+        ...
+
+    async def clear(self, conversation_id: str) -> None:
+        """Delete the conversation."""
+        ...
+
+
+class InMemoryConversationStore:
+    """Process-local store; each conversation is a deque capped at ``max_messages``."""
+
+    def __init__(self, max_messages: int):
+        self.max_messages = max_messages
+        self._conversations: dict[str, deque[BaseMessage]] = {}
+
+    async def get(self, conversation_id: str) -> list[BaseMessage]:
+        return list(self._conversations.get(conversation_id, ()))
+
+    async def append(self, conversation_id: str, *messages: BaseMessage) -> None:
+        if conversation_id not in self._conversations:
+            self._conversations[conversation_id] = deque(maxlen=self.max_messages)
+        self._conversations[conversation_id].extend(messages)
+
+    async def replace(self, conversation_id: str, messages: Sequence[BaseMessage]) -> None:
+        self._conversations[conversation_id] = deque(messages, maxlen=self.max_messages)
+
+    async def clear(self, conversation_id: str) -> None:
+        self._conversations.pop(conversation_id, None)
+
+
+class RedisConversationStore:
+    """Redis-backed store shared across workers, with a per-conversation TTL.
+
+    Messages are kept in a Redis list per conversation, next to a version counter that every
+    write increments. Recently used conversations are also held in a small in-process cache;
+    a cached copy is only served while its version still matches Redis, so turns appended or
+    compacted by other workers are never missed.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_messages: int,
+        ttl: int = 3600,
+        local_maxsize: int = 256,
+        local_ttl: int = 60,
+    ):
+        self.client = redis.from_url(url)
+        self.max_messages = max_messages
+        self.ttl = ttl
+        # conversation_id -> (version, messages)
+        self._local: TTLCache[str, tuple[int, deque[BaseMessage]]] = TTLCache(
+            maxsize=local_maxsize, ttl=local_ttl
+        )
+
+    @staticmethod
+    def _key(conversation_id: str) -> str:
+        return f"conversation:{conversation_id}"
+
+    @staticmethod
+    def _version_key(conversation_id: str) -> str:
+        return f"conversation:{conversation_id}:version"
+
+    async def get(self, conversation_id: str) -> list[BaseMessage]:
+        version_key = self._version_key(conversation_id)
+
+        cached = self._local.get(conversation_id)
+        if cached is not None:
+            version = await self.client.get(version_key)
+            if version is not None and int(version) == cached[0]:
+                return list(cached[1])
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.get(version_key)
+            pipe.lrange(self._key(conversation_id), 0, -1)
+            version, raw = await pipe.execute()
+
+        messages = messages_from_dict([orjson.loads(item) for item in raw])
+        if version is None:
+            self._local.pop(conversation_id, None)
+        else:
+            self._local[conversation_id] = (int(version), deque(messages, maxlen=self.max_messages))
+        return messages
+
+    async def append(self, conversation_id: str, *messages: BaseMessage) -> None:
+        key = self._key(conversation_id)
+        version_key = self._version_key(conversation_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, *(orjson.dumps(message_to_dict(m)) for m in messages))
+            pipe.ltrim(key, -self.max_messages, -1)
+            pipe.expire(key, self.ttl)
+            pipe.incr(version_key)
+            pipe.expire(version_key, self.ttl)
+            version = (await pipe.execute())[3]
+
+        # Extend the local copy only if no other writer got in between
+        cached = self._local.get(conversation_id)
+        if cached is not None and cached[0] == version - 1:
+            cached[1].extend(messages)
+            self._local[conversation_id] = (version, cached[1])
+        else:
+            self._local.pop(conversation_id, None)
+
+    async def replace(self, conversation_id: str, messages: Sequence[BaseMessage]) -> None:
+        key = self._key(conversation_id)
+        version_key = self._version_key(conversation_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if messages:
+                pipe.rpush(key, *(orjson.dumps(message_to_dict(m)) for m in messages))
+                pipe.ltrim(key, -self.max_messages, -1)
+                pipe.expire(key, self.ttl)
+            pipe.incr(version_key)
+            pipe.expire(version_key, self.ttl)
+            version = (await pipe.execute())[-2]
+
+        self._local[conversation_id] = (version, deque(messages, maxlen=self.max_messages))
+
+    async def clear(self, conversation_id: str) -> None:
+        await self.client.delete(self._key(conversation_id), self._version_key(conversation_id))
+        self._local.pop(conversation_id, None)
+
+
+def create_conversation_store(max_messages: int) -> ConversationStore:
+    """Use Redis when ``REDIS_URL`` is configured, otherwise keep conversations in process."""
+    if settings.redis_url:
+        return RedisConversationStore(settings.redis_url, max_messages, ttl=settings.conversation_ttl)
+    return InMemoryConversationStore(max_messages)
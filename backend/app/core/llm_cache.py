@@ -1,8 +1,10 @@
 import json
 import hashlib
 from typing import Optional, List
+from collections import OrderedDict
 from datetime import datetime
 from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from langchain_core.messages import BaseMessage, SystemMessage
 
@@ -10,51 +12,99 @@ from app.models.cache import LLMCache
 
 
 class ContextAwareLLMCache:
-    """Database-backed cache for LLM responses with conversation context awareness."""
+    """Database-backed cache for LLM responses with conversation context awareness.
 
-    def __init__(self, context_window: int = 5):
+    Recently used entries are also kept in a process-local LRU so hot keys skip the database.
+    Responses returned from it are shared, so callers must not mutate them.
+    """
+
+    def __init__(
+        self,
+        context_window: int = 5,
+        digest_cache_size: Optional[int] = None,
+        memory_cache_size: int = 1024,
+    ):
         self.context_window = context_window
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._memory_cache_size = memory_cache_size
+        # id(message) -> (message, digest). Holding the message keeps its id from being reused,
+        # so the memo only needs the context window of each active conversation (~64 by default).
+        self._message_digests: OrderedDict[int, tuple[BaseMessage, bytes]] = OrderedDict()
+        self._digest_cache_size = digest_cache_size if digest_cache_size is not None else context_window * 64
+
+    def _message_digest(self, msg: BaseMessage) -> bytes:
+        """Return the SHA-256 digest of a single message, computed once per message object."""
+        entry = self._message_digests.get(id(msg))
+        if entry is not None and entry[0] is msg:
+            self._message_digests.move_to_end(id(msg))
+            return entry[1]
+
+        payload = msg.__class__.__name__.encode() + b"\0" + str(msg.content).encode()
+        # Include tool calls if present (for AIMessage)
+        if hasattr(msg, 'tool_calls') and msg.tool_calls:
+            tool_calls = [
+                {"name": tc.get("name"), "args": tc.get("args")}
+                for tc in msg.tool_calls
+            ]
+            payload += b"\0" + json.dumps(tool_calls, sort_keys=True).encode()
+
+        digest = hashlib.sha256(payload).digest()
+        self._message_digests[id(msg)] = (msg, digest)
+        if len(self._message_digests) > self._digest_cache_size:
+            self._message_digests.popitem(last=False)
+        return digest
 
     def _get_cache_key(self, messages: List[BaseMessage], model: str) -> str:
         """Generate a cache key from messages INCLUDING conversation context."""
-        # Filter out system messages
-        non_system_messages = [m for m in messages if not isinstance(m, SystemMessage)]
+        if self.context_window == 1:
+            # Single-turn caching: the key is just the latest non-system message's digest
+            for msg in reversed(messages):
+                if not isinstance(msg, SystemMessage):
+                    return self._message_digest(msg).hex()
+            return hashlib.sha256().hexdigest()
+
+        # Take last N non-system messages for context (including current query),
+        # scanning back from the end instead of filtering the whole history
+        context_messages = []
+        for msg in reversed(messages):
+            if len(context_messages) == self.context_window:
+                break
+            if not isinstance(msg, SystemMessage):
+                context_messages.append(msg)
+        context_messages.reverse()
+
+        # Hash the per-message digests in order; each digest is computed once per message
+        context_hash = hashlib.sha256()
+        for msg in context_messages:
+            context_hash.update(self._message_digest(msg))
 
-        # Take last N messages for context (including current query)
-        context_messages = non_system_messages[-self.context_window:]
+        return context_hash.hexdigest()
 
-        # Create a structured representation of the conversation context
-        context_data = []
-        for msg in context_messages:
-            msg_data = {
-                "role": msg.__class__.__name__,
-                "content": str(msg.content)
-            }
-            # Include tool calls if present (for AIMessage)
-            if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                msg_data["tool_calls"] = [
-                    {"name": tc.get("name"), "args": tc.get("args")}
-                    for tc in msg.tool_calls
-                ]
-            context_data.append(msg_data)
-
-        # Create hash from the context
-        content = json.dumps(context_data, sort_keys=True)
-        context_hash = hashlib.sha256(content.encode()).hexdigest()
-
-        return context_hash
+    def _remember(self, key: str, response: dict) -> None:
+        """Store a response in the in-memory tier, evicting the least recently used entry."""
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._memory_cache_size:
+            self._memory.popitem(last=False)
 
     async def get(self, db: AsyncSession, messages: List[BaseMessage], model: str) -> Optional[dict]:
         """Retrieve cached response from database."""
         key = self._get_cache_key(messages, model)
 
+        response = self._memory.get(key)
+        if response is not None:
+            self._memory.move_to_end(key)
+            return response
+
         result = await db.execute(
             select(LLMCache).where(LLMCache.cache_key == key)
         )
         cached = result.scalar_one_or_none()
 
         if cached:
-            return json.loads(cached.response)
+            response = json.loads(cached.response)
+            self._remember(key, response)
+            return response
 
         return None
 
@@ -67,30 +117,31 @@ class ContextAwareLLMCache:
     ):
         """Store response in database cache."""
         key = self._get_cache_key(messages, model)
-
-        # Check if key exists and update, otherwise insert
-        result = await db.execute(
-            select(LLMCache).where(LLMCache.cache_key == key)
+        serialized = json.dumps(response)
+
+        # Insert, or update the existing entry, in a single round trip
+        stmt = pg_insert(LLMCache).values(
+            cache_key=key,
+            model=model,
+            response=serialized,
+            created_at=datetime.utcnow(),
         )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            existing.response = json.dumps(response)
-            existing.model = model
-            existing.created_at = datetime.utcnow()
-        else:
-            cache_entry = LLMCache(
-                cache_key=key,
-                model=model,
-                response=json.dumps(response)
-            )
-            db.add(cache_entry)
-
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LLMCache.cache_key],
+            set_={
+                "response": stmt.excluded.response,
+                "model": stmt.excluded.model,
+                "created_at": stmt.excluded.created_at,
+            },
+        )
+        await db.execute(stmt)
         await db.commit()
+        self._remember(key, response)
 
     async def delete(self, db: AsyncSession, messages: List[BaseMessage], model: str) -> bool:
         """Delete a specific cache entry. Returns True if entry was deleted."""
         key = self._get_cache_key(messages, model)
+        self._memory.pop(key, None)
 
         result = await db.execute(
             delete(LLMCache).where(LLMCache.cache_key == key)
@@ -100,6 +151,7 @@ class ContextAwareLLMCache:
 
     async def clear_all(self, db: AsyncSession) -> int:
         """Clear all cache entries. Returns count of deleted entries."""
+        self._memory.clear()
         result = await db.execute(delete(LLMCache))
         await db.commit()
         return result.rowcount
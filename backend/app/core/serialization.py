@@ -0,0 +1,10 @@
+from typing import Any
+import orjson
+
+
+def dumps(obj: Any) -> str:
+    """Serialize a tool result to a JSON string with orjson.
+
+    Values orjson cannot encode natively (e.g. Decimal) fall back to ``str``.
+    """
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
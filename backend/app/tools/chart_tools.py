@@ -1,13 +1,41 @@
 from typing import Any, Literal
 from langchain_core.tools import tool
-import json
+from app.core.serialization import dumps
+import re
 
 
 ChartType = Literal["line", "bar", "pie", "area", "scatter"]
 
+# Shared by every chart config; only ever serialized, never mutated
+_DEFAULT_COLORS = ("#8884d8", "#82ca9d", "#ffc658", "#ff7300", "#0088fe")
+_CHART_DEFAULTS = {
+    "responsive": True,
+    "maintainAspectRatio": True,
+    "legend": True,
+    "tooltip": True,
+    "grid": True,
+}
+
+# Intent keywords per recommendation bucket, in priority order
+_INTENT_KEYWORDS = {
+    "trend": ("trend", "over time", "monthly", "yearly", "growth"),
+    "comparison": ("compare", "versus", "between", "top", "by region", "by category"),
+    "distribution": ("share", "percentage", "proportion", "distribution"),
+    "correlation": ("relationship", "correlation", "impact"),
+}
+
+# One pass over the intent finds every keyword; the zero-width lookahead lets matches overlap
+# so a keyword is never hidden inside another bucket's match
+_INTENT_RE = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{name}>{'|'.join(map(re.escape, words))})"
+        for name, words in _INTENT_KEYWORDS.items()
+    ) + ")"
+)
+
 
 @tool
-def generate_chart_config(
+async def generate_chart_config(
     chart_type: ChartType,
     title: str,
     data: list[dict[str, Any]],
@@ -29,10 +57,8 @@ def generate_chart_config(
     Returns:
         JSON string with chart configuration for frontend rendering.
     """
-    default_colors = ["#8884d8", "#82ca9d", "#ffc658", "#ff7300", "#0088fe"]
-
     if colors is None:
-        colors = default_colors[: len(y_axis_keys)]
+        colors = _DEFAULT_COLORS[: len(y_axis_keys)]
 
     config = {
         "type": "chart",
@@ -42,20 +68,14 @@ def generate_chart_config(
         "xAxisKey": x_axis_key,
         "yAxisKeys": y_axis_keys,
         "colors": colors,
-        "config": {
-            "responsive": True,
-            "maintainAspectRatio": True,
-            "legend": True,
-            "tooltip": True,
-            "grid": True,
-        },
+        "config": _CHART_DEFAULTS,
     }
 
-    return json.dumps(config, default=str)
+    return dumps(config)
 
 
 @tool
-def suggest_visualization(data_description: str, query_intent: str) -> str:
+async def suggest_visualization(data_description: str, query_intent: str) -> str:
     """
     Suggest the best visualization type based on data and user intent.
 
@@ -89,20 +109,12 @@ def suggest_visualization(data_description: str, query_intent: str) -> str:
         },
     }
 
-    intent_lower = query_intent.lower()
-
-    if any(word in intent_lower for word in ["trend", "over time", "monthly", "yearly", "growth"]):
-        recommendation = recommendations["trend"]
-    elif any(word in intent_lower for word in ["compare", "versus", "between", "top", "by region", "by category"]):
-        recommendation = recommendations["comparison"]
-    elif any(word in intent_lower for word in ["share", "percentage", "proportion", "distribution"]):
-        recommendation = recommendations["distribution"]
-    elif any(word in intent_lower for word in ["relationship", "correlation", "impact"]):
-        recommendation = recommendations["correlation"]
-    else:
-        recommendation = recommendations["comparison"]
+    # Earlier buckets win when keywords from several appear in the intent
+    matched = {match.lastgroup for match in _INTENT_RE.finditer(query_intent.lower())}
+    bucket = next((name for name in _INTENT_KEYWORDS if name in matched), "comparison")
+    recommendation = recommendations[bucket]
 
-    return json.dumps(
+    return dumps(
         {
             "success": True,
             "recommendation": recommendation,
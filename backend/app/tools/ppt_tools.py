@@ -1,11 +1,13 @@
 from typing import Any
 from langchain_core.tools import tool
+from app.core.serialization import dumps
 import json
 import uuid
+from datetime import datetime, timezone
 
 
 @tool
-def create_presentation_outline(
+async def create_presentation_outline(
     title: str,
     slides: list[dict[str, Any]],
 ) -> str:
@@ -23,7 +25,7 @@ def create_presentation_outline(
     Returns:
         JSON string with presentation configuration for frontend preview.
     """
-    presentation_id = str(uuid.uuid4())
+    presentation_id = uuid.uuid4().hex
 
     formatted_slides = []
     for i, slide in enumerate(slides):
@@ -49,16 +51,16 @@ def create_presentation_outline(
         "title": title,
         "slides": formatted_slides,
         "metadata": {
-            "createdAt": str(uuid.uuid4()),
+            "createdAt": datetime.now(timezone.utc).isoformat(),
             "slideCount": len(formatted_slides),
         },
     }
 
-    return json.dumps(config, default=str)
+    return dumps(config)
 
 
 @tool
-def add_chart_to_presentation(
+async def add_chart_to_presentation(
     presentation_id: str,
     slide_id: str,
     chart_config: dict[str, Any],
@@ -80,7 +82,7 @@ def add_chart_to_presentation(
         except json.JSONDecodeError:
             chart_config = {"raw": chart_config}
 
-    return json.dumps(
+    return dumps(
         {
             "type": "presentation_update",
             "action": "add_chart",
@@ -92,8 +94,56 @@ def add_chart_to_presentation(
     )
 
 
+# Slide template returned by generate_presentation_suggestions for every topic
+_SUGGESTED_SLIDES_JSON = dumps([
+    {
+        "title": "Executive Summary",
+        "content_type": "bullets",
+        "description": "Key findings and highlights",
+    },
+    {
+        "title": "Data Overview",
+        "content_type": "mixed",
+        "description": "High-level metrics and KPIs",
+    },
+    {
+        "title": "Trend Analysis",
+        "content_type": "chart",
+        "description": "Time-based trends and patterns",
+        "suggestedChartType": "line",
+    },
+    {
+        "title": "Category Breakdown",
+        "content_type": "chart",
+        "description": "Comparison across categories",
+        "suggestedChartType": "bar",
+    },
+    {
+        "title": "Distribution Analysis",
+        "content_type": "chart",
+        "description": "Proportional distribution",
+        "suggestedChartType": "pie",
+    },
+    {
+        "title": "Key Insights",
+        "content_type": "bullets",
+        "description": "Main takeaways and findings",
+    },
+    {
+        "title": "Recommendations",
+        "content_type": "bullets",
+        "description": "Actionable recommendations",
+    },
+    {
+        "title": "Next Steps",
+        "content_type": "text",
+        "description": "Proposed action items",
+    },
+])
+
+
 @tool
-def generate_presentation_suggestions(topic: str, data_summary: str) -> str:
+async def generate_presentation_suggestions(topic: str, data_summary: str) -> str:
     """
     Generate slide suggestions for a presentation based on topic and available data.
 
@@ -104,57 +154,14 @@ def generate_presentation_suggestions(topic: str, data_summary: str) -> str:
     Returns:
         JSON string with suggested slide structure.
     """
-    suggestions = {
-        "type": "presentation_suggestions",
-        "topic": topic,
-        "suggestedSlides": [
-            {
-                "title": "Executive Summary",
-                "content_type": "bullets",
-                "description": "Key findings and highlights",
-            },
-            {
-                "title": "Data Overview",
-                "content_type": "mixed",
-                "description": "High-level metrics and KPIs",
-            },
-            {
-                "title": "Trend Analysis",
-                "content_type": "chart",
-                "description": "Time-based trends and patterns",
-                "suggestedChartType": "line",
-            },
-            {
-                "title": "Category Breakdown",
-                "content_type": "chart",
-                "description": "Comparison across categories",
-                "suggestedChartType": "bar",
-            },
-            {
-                "title": "Distribution Analysis",
-                "content_type": "chart",
-                "description": "Proportional distribution",
-                "suggestedChartType": "pie",
-            },
-            {
-                "title": "Key Insights",
-                "content_type": "bullets",
-                "description": "Main takeaways and findings",
-            },
-            {
-                "title": "Recommendations",
-                "content_type": "bullets",
-                "description": "Actionable recommendations",
-            },
-            {
-                "title": "Next Steps",
-                "content_type": "text",
-                "description": "Proposed action items",
-            },
-        ],
-    }
-
-    return json.dumps(suggestions)
+    # Only the topic varies; the slide template is serialized once at import
+    return (
+        '{"type":"presentation_suggestions","topic":'
+        + dumps(topic)
+        + ',"suggestedSlides":'
+        + _SUGGESTED_SLIDES_JSON
+        + "}"
+    )
 
 
 PPT_TOOLS = [create_presentation_outline, add_chart_to_presentation, generate_presentation_suggestions]
@@ -1,60 +1,152 @@
-from typing import Any
+from typing import Any, Callable, Sequence
+from decimal import Decimal
+from cachetools import TTLCache
 from langchain_core.tools import tool
-from sqlalchemy import text
+from sqlalchemy import text, TextClause
 from app.core.database import async_session_maker
-import json
+from app.core.serialization import dumps
+from app.models.analytics import SalesData, CustomerData, ProductData
+import hashlib
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Leading SELECT keyword, matched in place without copying or upper-casing the query
+_SELECT_RE = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+
+# Rows pulled per round-trip from the server-side cursor
+SQL_FETCH_BATCH_SIZE = 1000
+
+# The analytics data is read-only to the agent, so identical queries within a few minutes
+# (repeated table lookups, the summary) are served from memory. Failures and results over
+# SQL_CACHE_MAX_ROWS rows are not cached, so large ad-hoc results are not pinned in memory.
+SQL_CACHE_TTL = 300
+SQL_CACHE_MAX_ROWS = 1000
+_query_cache: TTLCache[str, dict[str, Any]] = TTLCache(maxsize=128, ttl=SQL_CACHE_TTL)
+
+# The fixed queries below are built once as TextClause objects and reused on every call.
+
+# All summary counts in one statement, so the tool costs a single round-trip
+ANALYTICS_SUMMARY_QUERY = text("""
+SELECT
+    (SELECT COUNT(*) FROM sales_data) AS sales_count,
+    (SELECT COUNT(*) FROM customers) AS customer_count,
+    (SELECT COUNT(*) FROM products) AS product_count
+""")
+
+# Sample rows per table, with the column list taken from the ORM models instead of SELECT *
+TABLE_SAMPLE_QUERIES = {
+    model.__tablename__: text(
+        f"SELECT {', '.join(column.name for column in model.__table__.columns)} "
+        f"FROM {model.__tablename__} LIMIT 5"
+    )
+    for model in (SalesData, CustomerData, ProductData)
+}
+VALID_TABLES = tuple(TABLE_SAMPLE_QUERIES)
+
+
+# Column values orjson cannot encode natively, mapped to a JSON-native conversion.
+# Dates, datetimes and UUIDs are handled by orjson itself.
+_VALUE_CONVERTERS: dict[type, Callable[[Any], Any]] = {Decimal: float}
+
+
+def _resolve_converters(
+    rows: Sequence[Sequence[Any]],
+    converters: list[Callable[[Any], Any] | None],
+    pending: set[int],
+) -> None:
+    """Pick converters for ``pending`` columns from their first non-NULL value in ``rows``.
+
+    Columns resolved here are removed from ``pending``; all-NULL columns stay pending so a
+    later batch can resolve them.
+    """
+    for row in rows:
+        for index in [i for i in pending if row[i] is not None]:
+            converters[index] = _VALUE_CONVERTERS.get(type(row[index]))
+            pending.discard(index)
+        if not pending:
+            return
+
 
-async def execute_sql_async(query: str) -> dict[str, Any]:
+async def execute_sql_async(query: str | TextClause) -> dict[str, Any]:
     """
     Execute a read-only SQL query asynchronously using SQLAlchemy AsyncSession.
 
     This function:
     - Opens an async database session
-    - Executes the provided SQL query
-    - Fetches all rows and converts them into a list of dictionaries
+    - Executes the provided SQL query on a server-side cursor
+    - Reads rows in batches of ``SQL_FETCH_BATCH_SIZE`` in columnar form: one list of
+      column names plus row tuples, avoiding a dict per row; NUMERIC values are
+      converted to float
+    - Caches successful results of up to ``SQL_CACHE_MAX_ROWS`` rows for
+      ``SQL_CACHE_TTL`` seconds; the returned dict may be shared between callers and
+      must not be mutated
 
     Parameters
     ----------
-    query : str
-        A SQL SELECT query to execute.
+    query : str | TextClause
+        A SQL SELECT query to execute, as a string or a prebuilt ``text()`` clause.
 
     Returns
     -------
     dict[str, Any]
         A dictionary containing:
         - success (bool): Whether execution succeeded
-        - data (list[dict]): Query result rows
+        - columns (list[str]): Column names
+        - rows (list[tuple]): Query result rows, values ordered as in ``columns``
         - row_count (int): Number of rows returned
-        - columns (list[str]): Column names (on success)
         - error (str): Error message (on failure)
     """
+    statement = query if isinstance(query, TextClause) else text(query)
+    cache_key = hashlib.blake2b(statement.text.encode(), digest_size=16).hexdigest()
+    cached = _query_cache.get(cache_key)
+    if cached is not None:
+        logger.info("SQL query cache hit")
+        return cached
+
     logger.info("Executing SQL query")
 
     async with async_session_maker() as session:
         try:
-            result = await session.execute(text(query))
-            rows = result.fetchall()
-            columns = result.keys()
-
-            data = [dict(zip(columns, row)) for row in rows]
-
-            return {
+            result = await session.stream(statement)
+            columns = list(result.keys())
+            rows = []
+            # Resolved per column at its first non-NULL value, so leading NULLs don't
+            # leave a NUMERIC column unconverted
+            converters: list[Callable[[Any], Any] | None] = [None] * len(columns)
+            pending = set(range(len(columns)))
+            async for partition in result.partitions(SQL_FETCH_BATCH_SIZE):
+                if pending:
+                    _resolve_converters(partition, converters, pending)
+                if any(converters):
+                    rows.extend(
+                        tuple(
+                            value if convert is None or value is None else convert(value)
+                            for convert, value in zip(converters, row)
+                        )
+                        for row in partition
+                    )
+                else:
+                    rows.extend(map(tuple, partition))
+
+            response = {
                 "success": True,
-                "data": data,
-                "row_count": len(data),
-                "columns": list(columns),
+                "columns": columns,
+                "rows": rows,
+                "row_count": len(rows),
             }
+            if len(rows) <= SQL_CACHE_MAX_ROWS:
+                _query_cache[cache_key] = response
+            return response
 
         except Exception as e:
             logger.exception("SQL execution failed")
             return {
                 "success": False,
                 "error": str(e),
-                "data": [],
+                "columns": [],
+                "rows": [],
                 "row_count": 0,
             }
 
@@ -76,21 +168,23 @@ async def execute_sql_query(query: str) -> str:
     Returns
     -------
     str
-        JSON string containing query results or an error message.
+        JSON string containing query results as ``columns`` plus ``rows``
+        (one array per row, values in column order), or an error message.
     """
     logger.info("execute_sql_query tool invoked")
 
-    if not query.strip().upper().startswith("SELECT"):
-        return json.dumps(
+    if not _SELECT_RE.match(query):
+        return dumps(
             {
                 "success": False,
                 "error": "Only SELECT queries are allowed",
-                "data": [],
+                "columns": [],
+                "rows": [],
             }
         )
 
     result = await execute_sql_async(query)
-    return json.dumps(result, default=str)
+    return dumps(result)
 
 
 @tool
@@ -112,19 +206,18 @@ async def get_table_info(table_name: str) -> str:
     str
         JSON string containing sample rows or an error message.
     """
-    valid_tables = ["sales_data", "customers", "products"]
+    query = TABLE_SAMPLE_QUERIES.get(table_name)
 
-    if table_name not in valid_tables:
-        return json.dumps(
+    if query is None:
+        return dumps(
             {
                 "success": False,
-                "error": f"Invalid table. Choose from: {valid_tables}",
+                "error": f"Invalid table. Choose from: {list(VALID_TABLES)}",
             }
         )
 
-    query = f"SELECT * FROM {table_name} LIMIT 5"
     result = await execute_sql_async(query)
-    return json.dumps(result, default=str)
+    return dumps(result)
 
 
 @tool
@@ -132,7 +225,7 @@ async def get_analytics_summary() -> str:
     """
     LangChain tool to generate a high-level analytics summary.
 
-    This tool runs multiple aggregate queries to provide:
+    This tool runs a single aggregate query to provide:
     - Total sales count
     - Total customer count
     - Total product count
@@ -142,20 +235,15 @@ async def get_analytics_summary() -> str:
     str
         JSON string containing a summary of key analytics metrics.
     """
-    queries = {
-        "sales_count": "SELECT COUNT(*) as count FROM sales_data",
-        "customer_count": "SELECT COUNT(*) as count FROM customers",
-        "product_count": "SELECT COUNT(*) as count FROM products",
-    }
+    result = await execute_sql_async(ANALYTICS_SUMMARY_QUERY)
 
     summary = {}
 
-    for key, query in queries.items():
-        result = await execute_sql_async(query)
-        if result["success"] and result["data"]:
-            summary[key] = result["data"][0]
+    if result["success"] and result["rows"]:
+        for key, count in zip(result["columns"], result["rows"][0]):
+            summary[key] = {"count": count}
 
-    return json.dumps({"success": True, "summary": summary}, default=str)
+    return dumps({"success": True, "summary": summary})
 
 # List of all available tools for the agent
 SQL_TOOLS = [
@@ -2,9 +2,10 @@
 
 import asyncio
 from datetime import date, timedelta
-from random import randint, choice, uniform, random
 from math import sin, pi
-from random import gauss
+import random
+
+from sqlalchemy import insert
 
 from app.core.database import engine, async_session_maker
 from app.models.analytics import SalesData, CustomerData, ProductData, Base
@@ -13,6 +14,11 @@ from app.models.analytics import SalesData, CustomerData, ProductData, Base
 # Constants
 # -------------------------------------------------------------------
 
+# One generator for the whole script; its bound methods skip the module-level wrappers
+rng = random.Random()
+
+SALES_INSERT_BATCH_SIZE = 2000
+
 REGIONS = ["North", "South", "East", "West"]
 SEGMENTS = ["Enterprise", "SMB", "Consumer"]
 
@@ -34,14 +40,14 @@ async def seed_products(session):
     for category, subcategories in CATEGORIES.items():
         for subcategory in subcategories:
             for i in range(5):
-                cost = round(uniform(10, 500), 2)
+                cost = round(rng.uniform(10, 500), 2)
                 product = ProductData(
                     id=product_id,
                     name=f"{subcategory} Product {i + 1}",
                     category=category,
                     subcategory=subcategory,
                     unit_cost=cost,
-                    unit_price=round(cost * uniform(1.2, 2.0), 2),
+                    unit_price=round(cost * rng.uniform(1.2, 2.0), 2),
                 )
                 products.append(product)
                 product_id += 1
@@ -61,18 +67,24 @@ async def seed_customers(session):
     first_names = ["John", "Jane", "Bob", "Alice", "Charlie", "Diana", "Eve", "Frank", "Grace", "Henry"]
     last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
 
-    for i in range(100):
-        first = choice(first_names)
-        last = choice(last_names)
+    num_customers = 100
+    today = date.today()
+
+    # Draw each categorical column for all customers at once
+    firsts = rng.choices(first_names, k=num_customers)
+    lasts = rng.choices(last_names, k=num_customers)
+    segments = rng.choices(SEGMENTS, k=num_customers)
+    regions = rng.choices(REGIONS, k=num_customers)
 
+    for i, (first, last, segment, region) in enumerate(zip(firsts, lasts, segments, regions)):
         customer = CustomerData(
             id=i + 1,
             name=f"{first} {last}",
             email=f"{first.lower()}.{last.lower()}{i}@example.com",
-            segment=choice(SEGMENTS),
-            region=choice(REGIONS),
-            joined_date=date.today() - timedelta(days=randint(30, 730)),
-            lifetime_value=round(uniform(100, 50000), 2),
+            segment=segment,
+            region=region,
+            joined_date=today - timedelta(days=rng.randint(30, 730)),
+            lifetime_value=round(rng.uniform(100, 50000), 2),
         )
         customers.append(customer)
 
@@ -88,6 +100,7 @@ async def seed_customers(session):
 async def seed_sales(session, products, customers):
     """Seed sales data with spikes, lows, seasonality, and growth."""
     sales = []
+    total_sales = 0
     start_date = date.today() - timedelta(days=730)
 
     REGION_MULTIPLIER = {
@@ -112,6 +125,9 @@ async def seed_sales(session, products, customers):
     SPIKE_PROBABILITY = 0.06   # ~6% spike days
     CRASH_PROBABILITY = 0.04  # ~4% low days
 
+    # ---- Daily volumes, planned up front ----
+    daily_volumes = []
+
     for day_offset in range(730):
         current_date = start_date + timedelta(days=day_offset)
 
@@ -123,47 +139,63 @@ async def seed_sales(session, products, customers):
 
         # ---- Base daily volume ----
         base_sales = 12 * seasonal_factor * growth_factor
-        num_sales = gauss(base_sales, 4)
+        num_sales = rng.gauss(base_sales, 4)
 
         # ---- Spike days ----
-        if random() < SPIKE_PROBABILITY:
-            num_sales *= uniform(2.0, 3.5)
+        if rng.random() < SPIKE_PROBABILITY:
+            num_sales *= rng.uniform(2.0, 3.5)
 
         # ---- Crash days ----
-        elif random() < CRASH_PROBABILITY:
-            num_sales *= uniform(0.15, 0.45)
+        elif rng.random() < CRASH_PROBABILITY:
+            num_sales *= rng.uniform(0.15, 0.45)
 
-        num_sales = max(2, int(num_sales))
+        daily_volumes.append((current_date, max(2, int(num_sales))))
 
-        for _ in range(num_sales):
-            product = choice(products)
-            customer = choice(customers)
+    # ---- Per-product and per-customer factors are fixed, so resolve them once ----
+    product_profiles = [(product, CATEGORY_DEMAND[product.category]) for product in products]
+    customer_profiles = [
+        (customer, SEGMENT_QTY_MULTIPLIER[customer.segment], REGION_MULTIPLIER[customer.region])
+        for customer in customers
+    ]
 
-            qty_min, qty_max = SEGMENT_QTY_MULTIPLIER[customer.segment]
-            quantity = randint(qty_min, qty_max)
+    for current_date, num_sales in daily_volumes:
+        # Draw the whole day's products and customers in one call each
+        day_products = rng.choices(product_profiles, k=num_sales)
+        day_customers = rng.choices(customer_profiles, k=num_sales)
 
-            demand_factor = CATEGORY_DEMAND[product.category]
-            region_factor = REGION_MULTIPLIER[customer.region]
+        for (product, demand_factor), (customer, (qty_min, qty_max), region_factor) in zip(
+            day_products, day_customers
+        ):
+            quantity = rng.randint(qty_min, qty_max)
 
             adjusted_qty = max(
                 1,
                 int(quantity * demand_factor * region_factor)
             )
 
-            sale = SalesData(
-                date=current_date,
-                product_id=product.id,
-                customer_id=customer.id,
-                quantity=adjusted_qty,
-                unit_price=product.unit_price,
-                total_amount=round(product.unit_price * adjusted_qty, 2),
-                region=customer.region,
-            )
-            sales.append(sale)
+            sales.append({
+                "date": current_date,
+                "product_id": product.id,
+                "customer_id": customer.id,
+                "quantity": adjusted_qty,
+                "unit_price": product.unit_price,
+                "total_amount": round(product.unit_price * adjusted_qty, 2),
+                "region": customer.region,
+            })
+
+            # Core executemany insert in fixed-size batches; skips the ORM unit of work
+            # and keeps only one batch of rows in memory
+            if len(sales) >= SALES_INSERT_BATCH_SIZE:
+                await session.execute(insert(SalesData), sales)
+                total_sales += len(sales)
+                sales.clear()
+
+    if sales:
+        await session.execute(insert(SalesData), sales)
+        total_sales += len(sales)
 
-    session.add_all(sales)
     await session.commit()
-    print(f"Seeded {len(sales)} HIGH-VARIANCE sales records")
+    print(f"Seeded {total_sales} HIGH-VARIANCE sales records")
 
 # -------------------------------------------------------------------
 # Main
@@ -177,9 +209,14 @@ async def main():
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
 
+    # Products and customers are independent, so seed them concurrently on separate sessions
+    async with async_session_maker() as product_session, async_session_maker() as customer_session:
+        products, customers = await asyncio.gather(
+            seed_products(product_session),
+            seed_customers(customer_session),
+        )
+
     async with async_session_maker() as session:
-        products = await seed_products(session)
-        customers = await seed_customers(session)
         await seed_sales(session, products, customers)
 
     print("Database seeding complete!")
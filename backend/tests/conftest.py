@@ -0,0 +1,4 @@
+import os
+
+# The agent module builds its OpenAI client at import time
+os.environ.setdefault("OPENAI_API_KEY", "test")
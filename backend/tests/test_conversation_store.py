@@ -0,0 +1,43 @@
+import asyncio
+
+import fakeredis
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.core.conversation_store import RedisConversationStore
+
+
+def make_workers(count: int) -> list[RedisConversationStore]:
+    """Stores that share one Redis server, as separate worker processes would."""
+    server = fakeredis.FakeServer()
+    stores = []
+    for _ in range(count):
+        store = RedisConversationStore("redis://localhost", max_messages=10)
+        store.client = fakeredis.aioredis.FakeRedis(server=server)
+        stores.append(store)
+    return stores
+
+
+def test_local_copy_is_not_served_after_another_worker_appends():
+    async def scenario():
+        first, second = make_workers(2)
+        await first.append("c1", HumanMessage(content="hi"))
+        assert len(await first.get("c1")) == 1
+
+        await second.append("c1", AIMessage(content="hello"), HumanMessage(content="more"))
+
+        return [m.content for m in await first.get("c1")]
+
+    assert asyncio.run(scenario()) == ["hi", "hello", "more"]
+
+
+def test_local_copy_is_not_served_after_another_worker_replaces():
+    async def scenario():
+        first, second = make_workers(2)
+        await first.append("c1", HumanMessage(content="a"), AIMessage(content="b"))
+        await first.get("c1")
+
+        await second.replace("c1", [AIMessage(content="summary")])
+
+        return [m.content for m in await first.get("c1")]
+
+    assert asyncio.run(scenario()) == ["summary"]
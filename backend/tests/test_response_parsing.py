@@ -0,0 +1,35 @@
+from app.agents.analytics_agent import merge_agent_outputs, parse_agent_response
+
+
+def test_unclosed_suggestions_block_does_not_swallow_chart_fence():
+    response = (
+        "Here is the breakdown.\n"
+        "[SUGGESTIONS]\n"
+        "- Show revenue by region\n"
+        "- Compare quarters\n"
+        '```chart\n{"type": "chart", "title": "Revenue"}\n```\n'
+    )
+
+    parsed = parse_agent_response(response)
+
+    assert parsed["text"] == "Here is the breakdown."
+    assert parsed["charts"] == [{"type": "chart", "title": "Revenue"}]
+    assert parsed["suggestions"] == ["Show revenue by region", "Compare quarters"]
+
+
+def test_merge_dedupes_repeated_tool_charts():
+    chart = {"type": "chart", "title": "Revenue", "data": [{"month": "Jan", "total": 10}]}
+    parsed = {"charts": [], "presentations": []}
+
+    charts, presentations = merge_agent_outputs(parsed, [chart, dict(chart)], [], [])
+
+    assert charts == [chart]
+    assert presentations == []
+
+
+def test_suggestion_bullets_are_trimmed():
+    response = "Done.\n[SUGGESTIONS]\n-\tTab after dash\n  - - Nested dash\n-Tight\n[/SUGGESTIONS]"
+
+    parsed = parse_agent_response(response)
+
+    assert parsed["suggestions"] == ["Tab after dash", "Nested dash", "Tight"]
@@ -0,0 +1,71 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from app.tools import sql_tools
+
+
+class FakeStreamResult:
+    def __init__(self, columns, partitions):
+        self._columns = columns
+        self._partitions = partitions
+
+    def keys(self):
+        return self._columns
+
+    async def partitions(self, size):
+        for partition in self._partitions:
+            yield partition
+
+
+class FakeSession:
+    def __init__(self, result):
+        self._result = result
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def stream(self, statement):
+        return self._result
+
+
+@pytest.fixture
+def stream_result(monkeypatch):
+    """Serve a canned streaming result to execute_sql_async."""
+    def use(columns, partitions):
+        result = FakeStreamResult(columns, partitions)
+        monkeypatch.setattr(sql_tools, "async_session_maker", lambda: FakeSession(result))
+        monkeypatch.setattr(sql_tools, "_query_cache", {})
+
+    return use
+
+
+def test_numeric_column_converted_when_first_row_is_null(stream_result):
+    stream_result(
+        ["region", "revenue"],
+        [
+            [("North", None), ("South", Decimal("12.50"))],
+            [("East", Decimal("3"))],
+        ],
+    )
+
+    result = asyncio.run(sql_tools.execute_sql_async("SELECT region, revenue FROM t"))
+
+    assert result["rows"] == [("North", None), ("South", 12.5), ("East", 3.0)]
+    assert all(isinstance(value, float) for _, value in result["rows"][1:])
+
+
+def test_results_over_row_limit_are_not_cached(stream_result, monkeypatch):
+    monkeypatch.setattr(sql_tools, "SQL_CACHE_MAX_ROWS", 2)
+    stream_result(["id"], [[(1,), (2,), (3,)]])
+
+    asyncio.run(sql_tools.execute_sql_async("SELECT id FROM t"))
+    assert sql_tools._query_cache == {}
+
+    stream_result(["id"], [[(1,), (2,)]])
+    asyncio.run(sql_tools.execute_sql_async("SELECT id FROM t LIMIT 2"))
+    assert len(sql_tools._query_cache) == 1